@@ -1,9 +1,32 @@
-from flask import Flask, jsonify
+from flask import Flask
+from flask_compress import Compress
 from app.config import get_config
 from app.models.dynamic import init_db
-from app.routes.api import api_bp
-from app.routes.sse import sse_bp
+from app.utils.json_utils import ORJSONProvider
+from app.utils.lazy_view import LazyView
 import logging
+import orjson
+
+# Bodies of the static JSON responses, serialized once at import
+_INDEX_BODY = orjson.dumps({
+    'name': 'Model Context Protocol (MCP)',
+    'version': '1.0.0',
+    'description': 'A Flask application integrated with PostgreSQL and LLM',
+    'endpoints': {
+        'api': '/api/tables',
+        'sse': '/sse/llm'
+    }
+})
+_NOT_FOUND_BODY = orjson.dumps({
+    'status': 'error',
+    'message': 'Not found'
+})
+_SERVER_ERROR_BODY = orjson.dumps({
+    'status': 'error',
+    'message': 'Internal server error'
+})
+
+compress = Compress()
 
 def create_app(config_name=None):
     """
@@ -16,9 +39,10 @@ def create_app(config_name=None):
         Flask application instance
     """
     app = Flask(__name__)
+    app.json = ORJSONProvider(app)
     
     # Configure the application
-    app.config.from_object(get_config())
+    app.config.from_object(get_config(config_name))
     
     # Set up logging
     logging.basicConfig(
@@ -27,41 +51,36 @@ def create_app(config_name=None):
     )
     
     # Initialize extensions
+    compress.init_app(app)
     with app.app_context():
         init_db(app)
     
-    # Register blueprints
+    # Register blueprints (imported here so that importing the package alone
+    # does not load the route modules)
+    from app.routes.api import api_bp
     app.register_blueprint(api_bp)
-    app.register_blueprint(sse_bp)
+    
+    # Register the SSE views lazily; their module pulls in the LLM stack,
+    # which is only imported once one of them is first requested
+    app.add_url_rule('/sse/models', 'sse.get_available_models',
+                     LazyView('app.routes.sse.get_available_models'), methods=['GET'])
+    app.add_url_rule('/sse/llm', 'sse.stream_llm_response',
+                     LazyView('app.routes.sse.stream_llm_response'), methods=['POST'])
     
     # Add an index route
     @app.route('/')
     def index():
         """Index route to provide basic information about the API."""
-        return jsonify({
-            'name': 'Model Context Protocol (MCP)',
-            'version': '1.0.0',
-            'description': 'A Flask application integrated with PostgreSQL and LLM',
-            'endpoints': {
-                'api': '/api/tables',
-                'sse': '/sse/llm'
-            }
-        })
+        return app.response_class(_INDEX_BODY, mimetype='application/json')
     
     # Add error handlers
     @app.errorhandler(404)
     def not_found(error):
-        return jsonify({
-            'status': 'error',
-            'message': 'Not found'
-        }), 404
+        return app.response_class(_NOT_FOUND_BODY, status=404, mimetype='application/json')
     
     @app.errorhandler(500)
     def server_error(error):
         app.logger.error(f"Server error: {str(error)}")
-        return jsonify({
-            'status': 'error',
-            'message': 'Internal server error'
-        }), 500
+        return app.response_class(_SERVER_ERROR_BODY, status=500, mimetype='application/json')
     
     return app 
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""
+ASGI entry point.
+LLM streaming is served from an asyncio endpoint, so one process can keep many
+SSE streams open without a worker or thread per stream. Every other route is
+handled by the Flask app, mounted through a WSGI adapter that runs requests on
+a thread pool (ASGI_WSGI_WORKERS threads, default 10).
+
+Run with:
+    uvicorn app.asgi:application --host 0.0.0.0 --port 5000
+"""
+
+import os
+import orjson
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+from app import create_app
+from app.llm.llm_client import LLMClient
+from app.utils.db_utils import generate_context_for_llm
+from app.utils.sse_utils import SSE_HEADERS, format_sse_message
+
+flask_app = create_app()
+
+def _build_context(tables):
+    """Generate the database context inside a Flask app context (runs in a worker thread)."""
+    with flask_app.app_context():
+        return generate_context_for_llm(table_names=tables)
+
+async def stream_llm_response(request):
+    """
+    Stream LLM responses with database context using SSE.
+    
+    Accepts the same JSON payload as the Flask view in app.routes.sse.
+    """
+    try:
+        body = await request.body()
+        data = orjson.loads(body) if body else None
+        if not data or 'prompt' not in data:
+            return Response(
+                format_sse_message({'error': 'Prompt is required'}),
+                status_code=400,
+                media_type='text/event-stream'
+            )
+        
+        prompt = data['prompt']
+        tables = data.get('tables', None)
+        model_name = data.get('model', None)
+        
+        # The database queries are blocking, so keep them off the event loop
+        context = await run_in_threadpool(_build_context, tables)
+        
+        llm_client = LLMClient(model=model_name)
+        flask_app.logger.info(f"Using LLM model: {llm_client.model_name}")
+        
+        async def generate():
+            """Generate SSE events for streaming LLM responses."""
+            yield format_sse_message({
+                'status': 'started',
+                'model': llm_client.model_name
+            })
+            
+            try:
+                chunks = await llm_client.agenerate_completion(prompt, context, streaming=True)
+                async for chunk in chunks:
+                    yield format_sse_message({'chunk': chunk})
+                
+                yield format_sse_message({'status': 'completed'})
+            except Exception as e:
+                flask_app.logger.error(f"Error in LLM streaming: {str(e)}")
+                yield format_sse_message({'error': str(e)})
+            
+            yield format_sse_message({'status': 'closed'}, event='close')
+        
+        return StreamingResponse(generate(), media_type='text/event-stream', headers=SSE_HEADERS)
+    
+    except Exception as e:
+        flask_app.logger.error(f"Error setting up LLM streaming: {str(e)}")
+        return Response(
+            format_sse_message({'error': str(e)}),
+            media_type='text/event-stream'
+        )
+
+application = Starlette(routes=[
+    Route('/sse/llm', stream_llm_response, methods=['POST']),
+    Mount('/', app=WSGIMiddleware(flask_app, workers=int(os.environ.get('ASGI_WSGI_WORKERS', 10))))
+])
\ No newline at end of file
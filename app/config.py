@@ -1,13 +1,69 @@
 import os
-from dotenv import load_dotenv
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+def load_env():
+    """
+    Load variables from a .env file into the environment.
+    
+    Set FLASK_SKIP_DOTENV=1 to skip this (e.g. when the environment is
+    already fully provided by the container or process manager).
+    """
+    if os.environ.get('FLASK_SKIP_DOTENV') != '1':
+        from dotenv import load_dotenv
+        load_dotenv()
+
+
+# The config classes below read os.environ at class-definition time, so the
+# .env file has to be loaded before they are defined.
+load_env()
+
+
+@dataclass(frozen=True, slots=True)
+class LLMSettings:
+    """LLM settings resolved once, with provider values falling back to the general ones."""
+    llm_model: str
+    default_model: str
+    openai_api_key: str
+    openai_api_url: str
+    openai_model: str
+    openai_gzip_requests: bool
+    ollama_api_url: str
+    ollama_model: str
 
-load_dotenv()
 
 class Config:
     """Base configuration."""
+    DEBUG = False
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-key-please-change')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'postgresql://postgres:postgres@db:5432/mcp')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool per worker process; pre-ping drops connections the server
+    # closed, recycling avoids idle timeouts on proxies and load balancers.
+    # Each gunicorn worker opens up to pool_size + max_overflow connections, so
+    # GUNICORN_WORKERS * (DB_POOL_SIZE + DB_MAX_OVERFLOW) has to stay below the
+    # server's max_connections (100 by default), e.g. 8 workers * (5 + 5) = 80.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 5)),
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'query_cache_size': int(os.environ.get('DB_QUERY_CACHE_SIZE', 1200))
+    }
+    
+    # Response compression (Flask-Compress). Only whole JSON/MessagePack bodies are
+    # compressed: compressing SSE or NDJSON streams would hold back frames until
+    # the compressor flushes, and Parquet is already compressed.
+    COMPRESS_MIMETYPES = ['application/json', 'application/x-msgpack']
+    COMPRESS_ALGORITHM = ['zstd', 'br', 'gzip']
+    COMPRESS_LEVEL = 3
+    COMPRESS_BR_LEVEL = 3
+    COMPRESS_ZSTD_LEVEL = 3
+    COMPRESS_STREAMS = False
+    
+    # Seconds before cached table information is refreshed in the background (0 disables)
+    SCHEMA_CACHE_TTL = int(os.environ.get('SCHEMA_CACHE_TTL', 300))
     
     # General LLM settings
     LLM_API_KEY = os.environ.get('LLM_API_KEY', '')
@@ -19,6 +75,8 @@ class Config:
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
     OPENAI_API_URL = os.environ.get('OPENAI_API_URL', 'https://api.openai.com/v1/chat/completions')
     OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo')
+    # Gzip large request bodies (only for endpoints that accept Content-Encoding: gzip)
+    OPENAI_GZIP_REQUESTS = os.environ.get('OPENAI_GZIP_REQUESTS') == '1'
     
     # Ollama-specific settings
     OLLAMA_API_URL = os.environ.get('OLLAMA_API_URL', 'http://localhost:11434/api/generate')
@@ -29,6 +87,19 @@ class Config:
         'openai': ['gpt-3.5-turbo', 'gpt-4'],
         'ollama': ['llama2', 'llama2:13b', 'mistral', 'codellama']
     }
+    
+    # Immutable view of the LLM settings above, so client constructors can
+    # read them directly instead of chaining os.environ/current_app.config lookups
+    LLM = LLMSettings(
+        llm_model=LLM_MODEL,
+        default_model=DEFAULT_LLM_MODEL,
+        openai_api_key=OPENAI_API_KEY or LLM_API_KEY,
+        openai_api_url=OPENAI_API_URL or 'https://api.openai.com/v1/chat/completions',
+        openai_model=OPENAI_MODEL or LLM_MODEL,
+        openai_gzip_requests=OPENAI_GZIP_REQUESTS,
+        ollama_api_url=OLLAMA_API_URL or 'http://localhost:11434/api/generate',
+        ollama_model=OLLAMA_MODEL or 'llama2'
+    )
 
 
 class DevelopmentConfig(Config):
@@ -54,7 +125,12 @@ config = {
     'default': DevelopmentConfig
 }
 
-def get_config():
+def get_config(config_name=None):
     """Return the appropriate configuration object based on the environment."""
-    config_name = os.environ.get('FLASK_ENV', 'default')
+    return _resolve_config(config_name or os.environ.get('FLASK_ENV', 'default'))
+
+
+@lru_cache(maxsize=None)
+def _resolve_config(config_name):
+    """Look up (and memoize) the configuration class for a given name."""
     return config[config_name] 
\ No newline at end of file
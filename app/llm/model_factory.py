@@ -3,16 +3,168 @@ Model Factory module for handling different LLM providers.
 This module implements a factory pattern to create and manage different LLM client implementations.
 """
 
-import os
-import json
-import requests
-import sseclient
+import gzip
+import logging
+import queue
+import threading
 from abc import ABC, abstractmethod
-from flask import current_app
+from functools import lru_cache
+from app.config import get_config
+
+log = logging.getLogger(__name__)
+
+# LLM settings are identical for every configuration, so they are read once
+_SETTINGS = get_config().LLM
+
+# Shared HTTP session so every LLM call reuses pooled keep-alive connections
+# instead of paying DNS/TCP/TLS setup per request. Built on first use so that
+# importing this module does not pull in requests/urllib3.
+_SESSION = None
+
+
+def _get_session():
+    """Return the shared, connection-pooling HTTP session for LLM calls."""
+    global _SESSION
+    if _SESSION is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=[429, 502, 503, 504])
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _SESSION = session
+    return _SESSION
+
+
+# Shared async HTTP client for callers running on an event loop (e.g. under
+# ASGI). HTTP/2 multiplexes concurrent streams over one connection per host.
+# Like any httpx.AsyncClient it must only be used from a single event loop.
+_ASYNC_CLIENT = None
+
+
+def _get_async_client():
+    """Return the shared async HTTP client for LLM calls."""
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is None:
+        import httpx
+
+        _ASYNC_CLIENT = httpx.AsyncClient(
+            http2=True,
+            timeout=60.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=100)
+        )
+    return _ASYNC_CLIENT
+
+
+# System prompts shared by all providers
+DEFAULT_SYSTEM_PROMPT = "You are an assistant that helps answer questions."
+CONTEXT_PROMPT_PREFIX = "You are an assistant with access to database information. Use this database context to help answer questions: "
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Request bodies smaller than this are not worth compressing
+_GZIP_MIN_SIZE = 1024
+
+# Upper bound on the bytes taken from the upstream response per read when
+# streaming; each read returns whatever has arrived, up to this size
+_STREAM_CHUNK_SIZE = 65536
+
+_STREAM_END = object()
+
+
+def _prefetch(tokens, maxsize=128):
+    """
+    Drain a token generator on a background thread.
+    
+    Tokens are handed over through a bounded queue, so reading the upstream
+    LLM response overlaps with writing chunks to our own client instead of
+    the two waiting on each other token by token.
+    
+    Args:
+        tokens: Generator yielding response chunks
+        maxsize (int, optional): Maximum number of buffered chunks
+        
+    Returns:
+        A generator yielding the same chunks as ``tokens``.
+    """
+    buffer = queue.Queue(maxsize=maxsize)
+    stopped = threading.Event()
+    errors = []
+    
+    def put(item):
+        # Give up once the consumer has gone away instead of blocking forever
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def produce():
+        try:
+            for token in tokens:
+                if not put(token):
+                    break
+        except Exception as e:
+            errors.append(e)
+        finally:
+            tokens.close()
+            put(_STREAM_END)
+    
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            token = buffer.get()
+            if token is _STREAM_END:
+                break
+            yield token
+        if errors:
+            raise errors[0]
+    finally:
+        stopped.set()
+
+
+def _iter_lines(response):
+    """
+    Yield the lines of a streaming response as soon as they arrive.
+    
+    requests' iter_lines() reads fixed-size chunks, and for upstreams that end
+    the stream by closing the connection (no chunked encoding) each read waits
+    until the whole chunk has arrived, holding tokens back. read1() returns
+    whatever is already available instead.
+    
+    Args:
+        response: A requests response opened with stream=True
+        
+    Yields:
+        Each line as bytes, without the line terminator.
+    """
+    pending = b""
+    while True:
+        data = response.raw.read1(_STREAM_CHUNK_SIZE, decode_content=True)
+        if not data:
+            break
+        lines = (pending + data).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if pending:
+        yield pending.rstrip(b"\r")
+
 
 class BaseLLMClient(ABC):
     """Base abstract class for LLM clients."""
     
+    # Provider name used in log and error messages
+    provider_name = "LLM"
+    
     @abstractmethod
     def generate_completion(self, prompt, context=None, streaming=False):
         """
@@ -28,210 +180,364 @@ class BaseLLMClient(ABC):
             If streaming is True, returns a generator that yields chunks of the response.
         """
         pass
+    
+    def _encode_request(self, headers, payload):
+        """
+        Serialize a request body.
+        
+        Returns:
+            A (headers, body) tuple to send.
+        """
+        import orjson
+        
+        return headers, orjson.dumps(payload)
+    
+    async def agenerate_completion(self, prompt, context=None, streaming=False):
+        """
+        Generate a completion from the LLM without blocking the event loop.
+        
+        Args:
+            prompt (str): The user's prompt
+            context (str, optional): Additional context to provide to the LLM
+            streaming (bool, optional): Whether to stream the response
+            
+        Returns:
+            If streaming is False, returns the full response as a string.
+            If streaming is True, returns an async generator that yields chunks of the response.
+        """
+        payload = self._build_payload(prompt, context, streaming)
+        if streaming:
+            return self._astream_response(self._headers, payload)
+        return await self._aget_full_response(self._headers, payload)
+    
+    async def _aget_full_response(self, headers, payload):
+        """Get a full response from the API over the shared async HTTP client."""
+        import httpx
+        import orjson
+        
+        headers, body = self._encode_request(headers, payload)
+        try:
+            response = await _get_async_client().post(
+                self.api_url,
+                headers=headers,
+                content=body
+            )
+            response.raise_for_status()
+            return self._parse_full_response(orjson.loads(response.content))
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+            log.error("Error calling %s API: %s", self.provider_name, e)
+            return f"Error generating response: {str(e)}"
+    
+    async def _astream_response(self, headers, payload):
+        """Stream a response from the API over the shared async HTTP client."""
+        import httpx
+        
+        headers, body = self._encode_request(headers, payload)
+        try:
+            async with _get_async_client().stream(
+                "POST",
+                self.api_url,
+                headers=headers,
+                content=body
+            ) as response:
+                response.raise_for_status()
+                
+                async for line in response.aiter_lines():
+                    content, done = self._parse_stream_line(line.encode())
+                    if content:
+                        yield content
+                    if done:
+                        break
+                
+        except httpx.HTTPError as e:
+            log.error("Error streaming from %s API: %s", self.provider_name, e)
+            yield f"Error generating streaming response: {str(e)}"
 
 
 class OpenAIClient(BaseLLMClient):
     """Client for interacting with OpenAI compatible APIs."""
     
+    provider_name = "OpenAI"
+    
     def __init__(self, model=None, api_key=None, api_url=None):
         """Initialize the OpenAI client."""
-        self.api_key = api_key or os.environ.get('OPENAI_API_KEY') or current_app.config.get('OPENAI_API_KEY')
-        # Fall back to general LLM keys if specific ones not provided
-        if not self.api_key:
-            self.api_key = os.environ.get('LLM_API_KEY') or current_app.config.get('LLM_API_KEY')
-            
-        self.api_url = api_url or os.environ.get('OPENAI_API_URL') or current_app.config.get('OPENAI_API_URL')
-        if not self.api_url:
-            self.api_url = "https://api.openai.com/v1/chat/completions"
-            
-        self.model = model or os.environ.get('OPENAI_MODEL') or current_app.config.get('OPENAI_MODEL')
-        if not self.model:
-            self.model = os.environ.get('LLM_MODEL') or current_app.config.get('LLM_MODEL', 'gpt-3.5-turbo')
+        self.api_key = api_key or _SETTINGS.openai_api_key
+        self.api_url = api_url or _SETTINGS.openai_api_url
+        self.model = model or _SETTINGS.openai_model
+        self.gzip_requests = _SETTINGS.openai_gzip_requests
         
         if not self.api_key:
             raise ValueError("OpenAI API key is required")
+        
+        # Request pieces that do not change between calls are built once here
+        self._headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
+        self._default_system_message = {
+            "role": "system",
+            "content": DEFAULT_SYSTEM_PROMPT
+        }
     
     def generate_completion(self, prompt, context=None, streaming=False):
         """Generate a completion from the OpenAI API."""
-        messages = []
+        payload = self._build_payload(prompt, context, streaming)
         
-        # Add system message with context if provided
+        if streaming:
+            # Return a generator for streaming responses
+            return self._stream_response(self._headers, payload)
+        else:
+            # Return the full response for non-streaming
+            return self._get_full_response(self._headers, payload)
+    
+    def _build_payload(self, prompt, context, streaming):
+        """Build the chat completions request body."""
+        # Use a system message with context if provided
         if context:
-            messages.append({
-                "role": "system",
-                "content": f"You are an assistant with access to database information. Use this database context to help answer questions: {context}"
-            })
+            system_message = {"role": "system", "content": CONTEXT_PROMPT_PREFIX + context}
         else:
-            messages.append({
-                "role": "system",
-                "content": "You are an assistant that helps answer questions."
-            })
-        
-        # Add user message
-        messages.append({
-            "role": "user",
-            "content": prompt
-        })
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
+            system_message = self._default_system_message
         
-        payload = {
+        return {
             "model": self.model,
-            "messages": messages,
+            "messages": [system_message, {"role": "user", "content": prompt}],
             "stream": streaming
         }
+    
+    def _encode_request(self, headers, payload):
+        """Serialize a request body, gzipping large ones when enabled."""
+        import orjson
         
-        if streaming:
-            # Return a generator for streaming responses
-            return self._stream_response(headers, payload)
-        else:
-            # Return the full response for non-streaming
-            return self._get_full_response(headers, payload)
+        body = orjson.dumps(payload)
+        if self.gzip_requests and len(body) > _GZIP_MIN_SIZE:
+            body = gzip.compress(body, compresslevel=1)
+            headers = {**headers, "Content-Encoding": "gzip"}
+        return headers, body
+    
+    @staticmethod
+    def _parse_full_response(response_json):
+        """Extract the completion text from a chat completions response."""
+        return response_json['choices'][0]['message']['content']
+    
+    @staticmethod
+    def _parse_stream_line(line):
+        """
+        Parse one line of the SSE stream.
+        
+        Returns:
+            A (content, done) tuple; content is None for lines without text.
+        """
+        import orjson
+        
+        # Split the SSE stream ourselves: only "data:" lines carry payloads,
+        # everything else (blank separators, comments, event names) is skipped.
+        if not line.startswith(b"data:"):
+            return None, False
+        
+        data = line[5:].lstrip()
+        if data == b"[DONE]":
+            return None, True
+        
+        try:
+            return orjson.loads(data)['choices'][0]['delta'].get('content'), False
+        except orjson.JSONDecodeError:
+            log.error("Error parsing SSE event: %s", data)
+        except (KeyError, IndexError):
+            # Skip events without content
+            pass
+        return None, False
     
     def _get_full_response(self, headers, payload):
         """Get a full response from the OpenAI API."""
+        import orjson
+        import requests
+        
+        headers, body = self._encode_request(headers, payload)
         try:
-            response = requests.post(
+            response = _get_session().post(
                 self.api_url,
                 headers=headers,
-                json=payload,
+                data=body,
                 timeout=60
             )
             response.raise_for_status()
-            response_json = response.json()
-            return response_json['choices'][0]['message']['content']
-        except requests.exceptions.RequestException as e:
-            current_app.logger.error(f"Error calling OpenAI API: {str(e)}")
+            return self._parse_full_response(orjson.loads(response.content))
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            log.error("Error calling OpenAI API: %s", e)
             return f"Error generating response: {str(e)}"
     
     def _stream_response(self, headers, payload):
         """Stream a response from the OpenAI API."""
+        return _prefetch(self._iter_stream(headers, payload))
+    
+    def _iter_stream(self, headers, payload):
+        """Read response chunks from a streaming OpenAI API call."""
+        import requests
+        import urllib3
+        
+        headers, body = self._encode_request(headers, payload)
         try:
-            response = requests.post(
+            response = _get_session().post(
                 self.api_url,
                 headers=headers,
-                json=payload,
+                data=body,
                 stream=True,
                 timeout=60
             )
             response.raise_for_status()
             
-            client = sseclient.SSEClient(response)
-            
-            for event in client.events():
-                if event.data == "[DONE]":
+            for line in _iter_lines(response):
+                content, done = self._parse_stream_line(line)
+                if content:
+                    yield content
+                if done:
                     break
                 
-                try:
-                    data = json.loads(event.data)
-                    content = data['choices'][0]['delta'].get('content', '')
-                    if content:
-                        yield content
-                except json.JSONDecodeError:
-                    current_app.logger.error(f"Error parsing SSE event: {event.data}")
-                except KeyError:
-                    # Skip events without content
-                    pass
-                
-        except requests.exceptions.RequestException as e:
-            current_app.logger.error(f"Error streaming from OpenAI API: {str(e)}")
+        except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as e:
+            log.error("Error streaming from OpenAI API: %s", e)
             yield f"Error generating streaming response: {str(e)}"
 
 
 class OllamaClient(BaseLLMClient):
     """Client for interacting with Ollama API."""
     
+    provider_name = "Ollama"
+    
     def __init__(self, model=None, api_url=None):
         """Initialize the Ollama client."""
-        self.api_url = api_url or os.environ.get('OLLAMA_API_URL') or current_app.config.get('OLLAMA_API_URL')
-        if not self.api_url:
-            # Default Ollama endpoint
-            self.api_url = "http://localhost:11434/api/generate"
-            
-        self.model = model or os.environ.get('OLLAMA_MODEL') or current_app.config.get('OLLAMA_MODEL')
-        if not self.model:
-            self.model = "llama2"  # Default Ollama model
+        self.api_url = api_url or _SETTINGS.ollama_api_url
+        self.model = model or _SETTINGS.ollama_model
+        self._headers = _JSON_HEADERS
     
     def generate_completion(self, prompt, context=None, streaming=False):
         """Generate a completion from the Ollama API."""
-        system_prompt = ""
-        if context:
-            system_prompt = f"You are an assistant with access to database information. Use this database context to help answer questions: {context}"
-        
-        headers = {
-            "Content-Type": "application/json"
-        }
+        payload = self._build_payload(prompt, context, streaming)
         
+        if streaming:
+            # Return a generator for streaming responses
+            return self._stream_response(self._headers, payload)
+        else:
+            # Return the full response for non-streaming
+            return self._get_full_response(self._headers, payload)
+    
+    def _build_payload(self, prompt, context, streaming):
+        """Build the generate request body."""
         payload = {
             "model": self.model,
             "prompt": prompt,
             "stream": streaming
         }
         
-        if system_prompt:
-            payload["system"] = system_prompt
+        if context:
+            payload["system"] = CONTEXT_PROMPT_PREFIX + context
+        return payload
+    
+    @staticmethod
+    def _parse_full_response(response_json):
+        """Extract the completion text from a generate response."""
+        return response_json.get('response', '')
+    
+    @staticmethod
+    def _parse_stream_line(line):
+        """
+        Parse one line of the newline-delimited JSON stream.
         
-        if streaming:
-            # Return a generator for streaming responses
-            return self._stream_response(headers, payload)
-        else:
-            # Return the full response for non-streaming
-            return self._get_full_response(headers, payload)
+        Returns:
+            A (content, done) tuple; content is None for lines without text.
+        """
+        import orjson
+        
+        if not line:
+            return None, False
+        
+        try:
+            data = orjson.loads(line)
+            return data.get('response'), data.get('done', False)
+        except orjson.JSONDecodeError:
+            log.error("Error parsing Ollama response: %s", line)
+        return None, False
     
     def _get_full_response(self, headers, payload):
         """Get a full response from the Ollama API."""
+        import orjson
+        import requests
+        
+        headers, body = self._encode_request(headers, payload)
         try:
-            response = requests.post(
+            response = _get_session().post(
                 self.api_url,
                 headers=headers,
-                json=payload,
+                data=body,
                 timeout=60
             )
             response.raise_for_status()
-            response_json = response.json()
-            return response_json.get('response', '')
-        except requests.exceptions.RequestException as e:
-            current_app.logger.error(f"Error calling Ollama API: {str(e)}")
+            return self._parse_full_response(orjson.loads(response.content))
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            log.error("Error calling Ollama API: %s", e)
             return f"Error generating response: {str(e)}"
     
     def _stream_response(self, headers, payload):
         """Stream a response from the Ollama API."""
+        return _prefetch(self._iter_stream(headers, payload))
+    
+    def _iter_stream(self, headers, payload):
+        """Read response chunks from a streaming Ollama API call."""
+        import requests
+        import urllib3
+        
+        headers, body = self._encode_request(headers, payload)
         try:
-            response = requests.post(
+            response = _get_session().post(
                 self.api_url,
                 headers=headers,
-                json=payload,
+                data=body,
                 stream=True,
                 timeout=60
             )
             response.raise_for_status()
             
-            for line in response.iter_lines():
-                if not line:
-                    continue
-                
-                try:
-                    data = json.loads(line)
-                    if 'response' in data:
-                        yield data['response']
-                    if data.get('done', False):
-                        break
-                except json.JSONDecodeError:
-                    current_app.logger.error(f"Error parsing Ollama response: {line}")
+            for line in _iter_lines(response):
+                content, done = self._parse_stream_line(line)
+                if content:
+                    yield content
+                if done:
+                    break
                 
-        except requests.exceptions.RequestException as e:
-            current_app.logger.error(f"Error streaming from Ollama API: {str(e)}")
+        except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as e:
+            log.error("Error streaming from Ollama API: %s", e)
             yield f"Error generating streaming response: {str(e)}"
 
 
+# Provider lookup: exact names first, then the first matching name prefix.
+# A provider of None marks models that are recognised but not yet supported.
+_EXACT_PROVIDERS = {
+    'gpt-3.5-turbo': OpenAIClient,
+    'gpt-4': OpenAIClient,
+    'claude': None,
+    'claude-2': None,
+    'claude-instant': None,
+    'mistral': OllamaClient,
+    'llama': OllamaClient,
+    'llama2': OllamaClient,
+    'codellama': OllamaClient,
+}
+
+_PREFIX_PROVIDERS = (
+    ('gpt', OpenAIClient),
+    ('text-davinci', OpenAIClient),
+    ('davinci', OpenAIClient),
+    ('claude', None),  # For future Anthropic support
+    ('mistral', OllamaClient),
+    ('llama', OllamaClient),
+    ('codellama', OllamaClient),
+)
+
+
 class LLMFactory:
     """Factory for creating LLM clients."""
     
-    @staticmethod
-    def get_llm_client(model_name=None):
+    @classmethod
+    def get_llm_client(cls, model_name=None):
         """
         Get the appropriate LLM client based on model name.
         
@@ -243,17 +549,29 @@ class LLMFactory:
         """
         if not model_name:
             # Get default model from config
-            model_name = current_app.config.get('DEFAULT_LLM_MODEL', 'gpt-3.5-turbo')
+            model_name = _SETTINGS.default_model
         
-        # Check model provider based on prefix or model name convention
-        if model_name.startswith(('gpt', 'text-davinci', 'davinci')):
-            return OpenAIClient(model=model_name)
-        elif model_name in ['claude', 'claude-2', 'claude-instant'] or model_name.startswith('claude'):
-            # For future Anthropic support
-            raise NotImplementedError(f"Support for {model_name} not yet implemented")
-        elif model_name in ['mistral', 'llama', 'llama2', 'codellama'] or model_name.startswith(('mistral', 'llama')):
-            return OllamaClient(model=model_name)
+        return cls._create_client(model_name)
+    
+    # Clients are stateless once configured, so one instance per model name is
+    # shared across requests. Model names come from request bodies, so the cache
+    # is bounded. Tests can reset it with LLMFactory._create_client.cache_clear().
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _create_client(model_name):
+        """Create a new client for the given model name."""
+        if model_name in _EXACT_PROVIDERS:
+            client_class = _EXACT_PROVIDERS[model_name]
         else:
-            # Default to OpenAI
-            current_app.logger.warning(f"Unknown model: {model_name}, defaulting to OpenAI client")
-            return OpenAIClient(model=model_name) 
\ No newline at end of file
+            for prefix, provider in _PREFIX_PROVIDERS:
+                if model_name.startswith(prefix):
+                    client_class = provider
+                    break
+            else:
+                # Default to OpenAI
+                log.warning("Unknown model: %s, defaulting to OpenAI client", model_name)
+                client_class = OpenAIClient
+        
+        if client_class is None:
+            raise NotImplementedError(f"Support for {model_name} not yet implemented")
+        return client_class(model=model_name)
\ No newline at end of file
@@ -1,10 +1,81 @@
+import threading
+import time
+from functools import lru_cache
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import MetaData, inspect, Table
+from sqlalchemy import MetaData, Table, bindparam, func, select, text
+from sqlalchemy.sql.expression import Executable
 from sqlalchemy.ext.declarative import declarative_base
 
 db = SQLAlchemy()
 metadata = MetaData()
 
+# Table information built from the last reflection, keyed by table name.
+# It is swapped out as a whole on refresh, so readers never see a partial build.
+_table_info_cache = {}
+_table_info_loaded_at = 0.0
+# Bumped on every reflection so derived caches know when to rebuild
+_schema_version = 0
+_refresh_lock = threading.Lock()
+
+# Statements built from the reflected tables, keyed by (Table, operation).
+# Reusing the same construct lets SQLAlchemy serve the compiled SQL from its cache.
+# Keying by the Table object rather than its name means a statement built from
+# a schema that was replaced mid-lookup is never served for the new one.
+_statement_cache = {}
+
+# Column names per table, stored with the table info they were built from
+_columns_cache = {}
+
+# Schema details for every table in the current schema, fetched with one
+# query each instead of several inspector round trips per table.
+_COLUMNS_SQL = """
+    SELECT cl.relname AS table_name,
+           a.attname AS column_name,
+           format_type(a.atttypid, a.atttypmod) AS type,
+           NOT a.attnotnull AS nullable,
+           pg_get_expr(d.adbin, d.adrelid) AS column_default
+    FROM pg_attribute a
+    JOIN pg_class cl ON cl.oid = a.attrelid
+    JOIN pg_namespace n ON n.oid = cl.relnamespace
+    LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+    WHERE n.nspname = current_schema()
+      AND cl.relkind IN ('r', 'p', 'v', 'm', 'f')
+      AND a.attnum > 0
+      AND NOT a.attisdropped
+    ORDER BY cl.relname, a.attnum
+"""
+
+_PRIMARY_KEYS_SQL = """
+    SELECT tc.table_name, kcu.column_name
+    FROM information_schema.table_constraints tc
+    JOIN information_schema.key_column_usage kcu
+      ON kcu.constraint_schema = tc.constraint_schema
+     AND kcu.constraint_name = tc.constraint_name
+     AND kcu.table_name = tc.table_name
+    WHERE tc.constraint_type = 'PRIMARY KEY'
+      AND tc.table_schema = current_schema()
+    ORDER BY tc.table_name, kcu.ordinal_position
+"""
+
+_FOREIGN_KEYS_SQL = """
+    SELECT cl.relname AS table_name,
+           array_agg(a.attname::text ORDER BY k.ord) AS constrained_columns,
+           rf.relname AS referred_table,
+           array_agg(af.attname::text ORDER BY k.ord) AS referred_columns
+    FROM pg_constraint c
+    JOIN pg_class cl ON cl.oid = c.conrelid
+    JOIN pg_namespace n ON n.oid = cl.relnamespace
+    JOIN pg_class rf ON rf.oid = c.confrelid
+    CROSS JOIN LATERAL unnest(c.conkey, c.confkey) WITH ORDINALITY AS k(attnum, refattnum, ord)
+    JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+    JOIN pg_attribute af ON af.attrelid = c.confrelid AND af.attnum = k.refattnum
+    WHERE c.contype = 'f'
+      AND n.nspname = current_schema()
+    GROUP BY c.oid, cl.relname, rf.relname
+    ORDER BY cl.relname, c.conname
+"""
+
 def init_db(app):
     """Initialize the database with the app context."""
     db.init_app(app)
@@ -13,10 +84,60 @@ def init_db(app):
         reflect_db()
 
 def reflect_db():
-    """Reflect all tables from the database."""
-    metadata.reflect(bind=db.engine)
+    """Reflect all tables from the database and rebuild the table info cache."""
+    global metadata, _table_info_cache, _table_info_loaded_at, _schema_version
+    # Reflect into a fresh MetaData: reflect() skips tables it already holds, so
+    # reusing the old one would miss altered tables and keep dropped ones.
+    # Readers keep using the previous schema until the new one is swapped in.
+    reflected = MetaData()
+    reflected.reflect(bind=db.engine)
+    tables_info = _load_table_info(reflected.tables)
+    
+    metadata = reflected
+    _table_info_cache = tables_info
+    _statement_cache.clear()
+    _columns_cache.clear()
+    _table_info_loaded_at = time.monotonic()
+    # Bump only after the new info is in place, so a version is never paired with older info
+    _schema_version += 1
     return metadata
 
+def _revalidate_if_stale():
+    """
+    Start a background refresh of the table info cache once it is older than
+    SCHEMA_CACHE_TTL seconds. Callers keep getting the stale data meanwhile.
+    """
+    ttl = current_app.config.get('SCHEMA_CACHE_TTL', 0)
+    if not ttl or time.monotonic() - _table_info_loaded_at < ttl:
+        return
+    if not _refresh_lock.acquire(blocking=False):
+        # A refresh is already running
+        return
+    
+    app = current_app._get_current_object()
+    try:
+        threading.Thread(target=_refresh_in_background, args=(app,), daemon=True).start()
+    except Exception:
+        _refresh_lock.release()
+        raise
+
+def _refresh_in_background(app):
+    """Re-reflect the database outside of the request that noticed the stale cache."""
+    global _table_info_loaded_at
+    try:
+        with app.app_context():
+            reflect_db()
+    except Exception as e:
+        # Keep serving the stale data and try again after another TTL
+        _table_info_loaded_at = time.monotonic()
+        app.logger.error(f"Error refreshing schema cache: {str(e)}")
+    finally:
+        _refresh_lock.release()
+
+def get_schema_version():
+    """Get a counter that changes whenever the schema is reflected again."""
+    return _schema_version
+
 def get_tables():
     """Get all tables from the database."""
     return metadata.tables
@@ -31,56 +152,167 @@ def get_engine():
     """Get the SQLAlchemy engine."""
     return db.engine
 
-def execute_query(query, params=None):
-    """Execute a raw SQL query and return the results."""
-    with db.engine.connect() as connection:
-        if params:
-            result = connection.execute(query, params)
-        else:
-            result = connection.execute(query)
+def get_statement(table_name, operation):
+    """
+    Get a reusable statement for a common operation on a table.
+    
+    Statements take their values as bound parameters: 'limit' and 'offset' for
+    'select', 'limit' for 'sample', the column values for 'insert' and 'update',
+    and 'pk_value' for the primary key in 'update' and 'delete'.
+    
+    Args:
+        table_name (str): Name of the reflected table
+        operation (str): One of 'select', 'sample', 'count', 'insert', 'update' or 'delete'
+        
+    Returns:
+        The statement, or None if the table does not exist.
+    """
+    table = get_table(table_name)
+    if table is None:
+        return None
+    key = (table, operation)
+    statement = _statement_cache.get(key)
+    if statement is None:
+        statement = _build_statement(table, operation)
+        _statement_cache[key] = statement
+    return statement
+
+def _build_statement(table, operation):
+    """Build the statement for an operation from the table's reflected columns."""
+    if operation == 'select':
+        return select(table).limit(bindparam('limit')).offset(bindparam('offset'))
+    if operation == 'sample':
+        return select(table).limit(bindparam('limit'))
+    if operation == 'count':
+        return select(func.count()).select_from(table)
+    if operation == 'insert':
+        return table.insert().returning(*table.c)
+    
+    primary_key = list(table.primary_key.columns)[0]
+    if operation == 'update':
+        return table.update().where(primary_key == bindparam('pk_value')).returning(*table.c)
+    if operation == 'delete':
+        return table.delete().where(primary_key == bindparam('pk_value')).returning(*table.c)
+    raise ValueError(f"Unknown operation: {operation}")
+
+@lru_cache(maxsize=256)
+def _compile_query(query):
+    """Wrap a raw SQL string in a (memoized) executable text clause."""
+    return text(query)
+
+def execute_query(query, params=None, as_mappings=False):
+    """
+    Execute a query in its own transaction and return the results.
+    
+    Args:
+        query (str | Executable): The SQL query or statement to execute
+        params (dict, optional): Bound parameters for the query
+        as_mappings (bool, optional): Return dict-like rows keyed by column name
+        
+    Returns:
+        A list of Row objects, or RowMapping objects when as_mappings is set.
+        For statements that return no rows (e.g. UPDATE without RETURNING),
+        the number of affected rows (0 when the driver reports none, e.g. for DDL).
+    """
+    statement = query if isinstance(query, Executable) else _compile_query(query)
+    with db.engine.begin() as connection:
+        result = connection.execute(statement, params or {})
+        if not result.returns_rows:
+            return max(result.rowcount, 0)
+        if as_mappings:
+            return result.mappings().all()
         return result.fetchall()
 
+def stream_query(query, params=None, batch_size=1000):
+    """
+    Execute a raw SQL query on a server-side cursor and yield its rows.
+    
+    Args:
+        query (str): The SQL query to execute
+        params (dict, optional): Bound parameters for the query
+        batch_size (int, optional): Number of rows fetched from the server at a time
+        
+    Yields:
+        RowMapping objects, one per result row.
+    """
+    statement = _compile_query(query)
+    with db.engine.connect() as connection:
+        connection = connection.execution_options(stream_results=True, yield_per=batch_size)
+        result = connection.execute(statement, params or {})
+        yield from result.mappings()
+
 def get_table_info(table_name):
     """Get detailed information about a table."""
-    if table_name not in metadata.tables:
+    _revalidate_if_stale()
+    return _table_info_cache.get(table_name)
+
+def columns_of(table_name):
+    """
+    Get the column names of a table, in table order.
+    
+    Args:
+        table_name (str): Name of the table
+        
+    Returns:
+        A tuple of column names, or None if the table does not exist.
+    """
+    table_info = get_table_info(table_name)
+    if not table_info:
         return None
+    cached = _columns_cache.get(table_name)
+    # Only reuse columns derived from the current table info, so an entry
+    # written back from before a refresh is rebuilt rather than served
+    if cached is not None and cached[0] is table_info:
+        return cached[1]
+    columns = tuple(col['name'] for col in table_info['columns'])
+    _columns_cache[table_name] = (table_info, columns)
+    return columns
+
+def _load_table_info(table_names):
+    """Load column, foreign key and primary key details for the given tables."""
+    with db.engine.connect() as connection:
+        column_rows = connection.execute(text(_COLUMNS_SQL)).fetchall()
+        primary_key_rows = connection.execute(text(_PRIMARY_KEYS_SQL)).fetchall()
+        foreign_key_rows = connection.execute(text(_FOREIGN_KEYS_SQL)).fetchall()
     
-    table = metadata.tables[table_name]
-    inspector = inspect(db.engine)
+    tables_info = {}
+    for table_name in table_names:
+        tables_info[table_name] = {
+            'name': table_name,
+            'columns': [],
+            'foreign_keys': [],
+            'primary_keys': []
+        }
+    
+    # Get primary key information
+    for table_name, column_name in primary_key_rows:
+        if table_name in tables_info:
+            tables_info[table_name]['primary_keys'].append(column_name)
     
     # Get column information
-    columns = []
-    for column in inspector.get_columns(table_name):
-        columns.append({
-            'name': column['name'],
-            'type': str(column['type']),
-            'nullable': column['nullable'],
-            'default': column['default'],
-            'primary_key': column.get('primary_key', False)
-        })
+    for table_name, column_name, column_type, nullable, default in column_rows:
+        if table_name in tables_info:
+            table_info = tables_info[table_name]
+            table_info['columns'].append({
+                'name': column_name,
+                'type': column_type,
+                'nullable': nullable,
+                'default': default,
+                'primary_key': column_name in table_info['primary_keys']
+            })
     
     # Get foreign key information
-    foreign_keys = []
-    for fk in inspector.get_foreign_keys(table_name):
-        foreign_keys.append({
-            'constrained_columns': fk['constrained_columns'],
-            'referred_table': fk['referred_table'],
-            'referred_columns': fk['referred_columns']
-        })
-    
-    # Get primary key information
-    primary_keys = inspector.get_pk_constraint(table_name)
+    for table_name, constrained_columns, referred_table, referred_columns in foreign_key_rows:
+        if table_name in tables_info:
+            tables_info[table_name]['foreign_keys'].append({
+                'constrained_columns': constrained_columns,
+                'referred_table': referred_table,
+                'referred_columns': referred_columns
+            })
     
-    return {
-        'name': table_name,
-        'columns': columns,
-        'foreign_keys': foreign_keys,
-        'primary_keys': primary_keys['constrained_columns'] if primary_keys else []
-    }
+    return tables_info
 
 def get_all_tables_info():
     """Get detailed information about all tables."""
-    table_info = {}
-    for table_name in metadata.tables:
-        table_info[table_name] = get_table_info(table_name)
-    return table_info 
\ No newline at end of file
+    _revalidate_if_stale()
+    return _table_info_cache
\ No newline at end of file
@@ -1,17 +1,84 @@
-from flask import Blueprint, jsonify, request, current_app
+import re
+from flask import Blueprint, request, current_app, stream_with_context
 from sqlalchemy import text
-from app.models.dynamic import get_table, reflect_db, get_table_info, execute_query, get_all_tables_info
+from app.models.dynamic import get_table, reflect_db, get_table_info, execute_query, get_all_tables_info, stream_query, get_statement
+from app.utils.binary_formats import MSGPACK_MIMETYPE, PARQUET_MIMETYPE, available_mimetypes, to_msgpack, to_parquet
+from app.utils.json_utils import dumps
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Response formats each endpoint can negotiate; JSON comes first so it wins ties (e.g. */*).
+# Binary formats are only offered when their encoder is installed, so clients that
+# ask for one of them with a JSON fallback get JSON rather than an error.
+_ROWS_FORMATS = ['application/json'] + available_mimetypes()
+_QUERY_FORMATS = ['application/json', NDJSON_MIMETYPE] + available_mimetypes()
+
+# Matches in place, without copying the query the way strip()/lower() would
+_SELECT_RE = re.compile(r'\s*select\b', re.IGNORECASE)
+
+def ojsonify(obj, status=200):
+    """Build a JSON response serialized with orjson."""
+    return current_app.response_class(dumps(obj), status=status, mimetype='application/json')
+
+def _is_select(query):
+    """Check whether a SQL query starts with SELECT (ignoring leading whitespace and case)."""
+    return _SELECT_RE.match(query) is not None
+
+def _preferred_format(formats):
+    """Pick the response mimetype the client prefers among the given formats (JSON by default)."""
+    return request.accept_mimetypes.best_match(formats, default='application/json')
+
+def _rows_response(obj, rows, mimetype):
+    """
+    Build a response for a row result in the negotiated format.
+    
+    Args:
+        obj: The response envelope, as it would be sent as JSON
+        rows: The rows, used on their own for Parquet
+        mimetype (str): The negotiated mimetype
+        
+    Returns:
+        The response.
+    """
+    if mimetype == MSGPACK_MIMETYPE:
+        return current_app.response_class(to_msgpack(obj), mimetype=MSGPACK_MIMETYPE)
+    if mimetype == PARQUET_MIMETYPE:
+        return current_app.response_class(to_parquet(rows), mimetype=PARQUET_MIMETYPE)
+    return ojsonify(obj)
+
+def _ndjson_response(rows):
+    """
+    Stream rows as newline-delimited JSON.
+    
+    The first row is fetched before the response starts, so errors in the
+    query are still reported as a regular JSON error response.
+    
+    Args:
+        rows: An iterator of row mappings
+        
+    Returns:
+        A streaming response with one JSON object per line.
+    """
+    first = next(rows, None)
+    
+    @stream_with_context
+    def generate():
+        if first is None:
+            return
+        yield dumps(first) + b"\n"
+        for row in rows:
+            yield dumps(row) + b"\n"
+    
+    return current_app.response_class(generate(), mimetype=NDJSON_MIMETYPE)
+
 @api_bp.route('/tables', methods=['GET'])
 def get_tables():
     """Get a list of all tables in the database."""
     try:
-        # Refresh the metadata to ensure we have the latest schema
-        reflect_db()
         tables_info = get_all_tables_info()
-        return jsonify({
+        return ojsonify({
             'status': 'success',
             'data': {
                 'tables': list(tables_info.keys())
@@ -19,7 +86,25 @@ def get_tables():
         })
     except Exception as e:
         current_app.logger.error(f"Error getting tables: {str(e)}")
-        return jsonify({
+        return ojsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@api_bp.route('/refresh', methods=['POST'])
+def refresh_schema():
+    """Re-reflect the database schema and reload the cached table information."""
+    try:
+        reflect_db()
+        return ojsonify({
+            'status': 'success',
+            'data': {
+                'tables': list(get_all_tables_info().keys())
+            }
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error refreshing schema: {str(e)}")
+        return ojsonify({
             'status': 'error',
             'message': str(e)
         }), 500
@@ -30,18 +115,18 @@ def get_table_details(table_name):
     try:
         table_info = get_table_info(table_name)
         if not table_info:
-            return jsonify({
+            return ojsonify({
                 'status': 'error',
                 'message': f"Table '{table_name}' not found"
             }), 404
         
-        return jsonify({
+        return ojsonify({
             'status': 'success',
             'data': table_info
         })
     except Exception as e:
         current_app.logger.error(f"Error getting table details: {str(e)}")
-        return jsonify({
+        return ojsonify({
             'status': 'error',
             'message': str(e)
         }), 500
@@ -52,8 +137,8 @@ def get_table_rows(table_name):
     try:
         # Verify table exists
         table = get_table(table_name)
-        if not table:
-            return jsonify({
+        if table is None:
+            return ojsonify({
                 'status': 'error',
                 'message': f"Table '{table_name}' not found"
             }), 404
@@ -62,23 +147,10 @@ def get_table_rows(table_name):
         limit = request.args.get('limit', 100, type=int)
         offset = request.args.get('offset', 0, type=int)
         
-        # Build the query
-        query = f"SELECT * FROM {table_name} LIMIT :limit OFFSET :offset"
-        results = execute_query(query, {'limit': limit, 'offset': offset})
-        
-        # Get column names for the table
-        table_info = get_table_info(table_name)
-        columns = [col['name'] for col in table_info['columns']]
-        
-        # Format results as a list of dictionaries
-        rows = []
-        for result in results:
-            row = {}
-            for i, col in enumerate(columns):
-                row[col] = result[i]
-            rows.append(row)
+        query = get_statement(table_name, 'select')
+        rows = execute_query(query, {'limit': limit, 'offset': offset}, as_mappings=True)
         
-        return jsonify({
+        return _rows_response({
             'status': 'success',
             'data': {
                 'rows': rows,
@@ -86,10 +158,10 @@ def get_table_rows(table_name):
                 'limit': limit,
                 'offset': offset
             }
-        })
+        }, rows, _preferred_format(_ROWS_FORMATS))
     except Exception as e:
         current_app.logger.error(f"Error getting table rows: {str(e)}")
-        return jsonify({
+        return ojsonify({
             'status': 'error',
             'message': str(e)
         }), 500
@@ -100,8 +172,8 @@ def create_row(table_name):
     try:
         # Verify table exists
         table = get_table(table_name)
-        if not table:
-            return jsonify({
+        if table is None:
+            return ojsonify({
                 'status': 'error',
                 'message': f"Table '{table_name}' not found"
             }), 404
@@ -109,39 +181,22 @@ def create_row(table_name):
         # Get the data from request
         data = request.json
         if not data:
-            return jsonify({
+            return ojsonify({
                 'status': 'error',
                 'message': "No data provided"
             }), 400
         
-        # Build column and value lists
-        columns = []
-        values = []
-        params = {}
-        
-        for col, val in data.items():
-            columns.append(col)
-            values.append(f":{col}")
-            params[col] = val
-        
-        # Build and execute the query
-        columns_str = ", ".join(columns)
-        values_str = ", ".join(values)
-        query = f"INSERT INTO {table_name} ({columns_str}) VALUES ({values_str}) RETURNING *"
-        
-        result = execute_query(query, params)
-        
-        # Get column names for the table
-        table_info = get_table_info(table_name)
-        column_names = [col['name'] for col in table_info['columns']]
+        unknown_columns = [col for col in data if col not in table.c]
+        if unknown_columns:
+            return ojsonify({
+                'status': 'error',
+                'message': f"Unknown columns for table '{table_name}': {', '.join(unknown_columns)}"
+            }), 400
         
-        # Format the result
-        created_row = {}
-        for i, col in enumerate(column_names):
-            if i < len(result[0]):
-                created_row[col] = result[0][i]
+        result = execute_query(get_statement(table_name, 'insert'), data, as_mappings=True)
+        created_row = result[0]
         
-        return jsonify({
+        return ojsonify({
             'status': 'success',
             'data': {
                 'row': created_row
@@ -149,7 +204,7 @@ def create_row(table_name):
         }), 201
     except Exception as e:
         current_app.logger.error(f"Error creating row: {str(e)}")
-        return jsonify({
+        return ojsonify({
             'status': 'error',
             'message': str(e)
         }), 500
@@ -160,8 +215,8 @@ def update_row(table_name, row_id):
     try:
         # Verify table exists
         table = get_table(table_name)
-        if not table:
-            return jsonify({
+        if table is None:
+            return ojsonify({
                 'status': 'error',
                 'message': f"Table '{table_name}' not found"
             }), 404
@@ -169,55 +224,43 @@ def update_row(table_name, row_id):
         # Get the data from request
         data = request.json
         if not data:
-            return jsonify({
+            return ojsonify({
                 'status': 'error',
                 'message': "No data provided"
             }), 400
         
+        unknown_columns = [col for col in data if col not in table.c]
+        if unknown_columns:
+            return ojsonify({
+                'status': 'error',
+                'message': f"Unknown columns for table '{table_name}': {', '.join(unknown_columns)}"
+            }), 400
+        
         # Get primary key column
         table_info = get_table_info(table_name)
         primary_keys = table_info['primary_keys']
         
         if not primary_keys:
-            return jsonify({
+            return ojsonify({
                 'status': 'error',
                 'message': f"Table '{table_name}' has no primary key"
             }), 400
         
         primary_key = primary_keys[0]  # Use the first primary key
         
-        # Build SET clause and parameters
-        set_clauses = []
-        params = {}
-        
-        for col, val in data.items():
-            set_clauses.append(f"{col} = :{col}")
-            params[col] = val
-        
-        params['id'] = row_id
-        
-        # Build and execute the query
-        set_clause = ", ".join(set_clauses)
-        query = f"UPDATE {table_name} SET {set_clause} WHERE {primary_key} = :id RETURNING *"
-        
-        result = execute_query(query, params)
+        # Column values bind by name, the primary key as 'pk_value'
+        params = dict(data, pk_value=row_id)
+        result = execute_query(get_statement(table_name, 'update'), params, as_mappings=True)
         
         if not result:
-            return jsonify({
+            return ojsonify({
                 'status': 'error',
                 'message': f"Row with {primary_key}={row_id} not found"
             }), 404
         
-        # Get column names for the table
-        column_names = [col['name'] for col in table_info['columns']]
+        updated_row = result[0]
         
-        # Format the result
-        updated_row = {}
-        for i, col in enumerate(column_names):
-            if i < len(result[0]):
-                updated_row[col] = result[0][i]
-        
-        return jsonify({
+        return ojsonify({
             'status': 'success',
             'data': {
                 'row': updated_row
@@ -225,7 +268,7 @@ def update_row(table_name, row_id):
         })
     except Exception as e:
         current_app.logger.error(f"Error updating row: {str(e)}")
-        return jsonify({
+        return ojsonify({
             'status': 'error',
             'message': str(e)
         }), 500
@@ -236,8 +279,8 @@ def delete_row(table_name, row_id):
     try:
         # Verify table exists
         table = get_table(table_name)
-        if not table:
-            return jsonify({
+        if table is None:
+            return ojsonify({
                 'status': 'error',
                 'message': f"Table '{table_name}' not found"
             }), 404
@@ -247,30 +290,28 @@ def delete_row(table_name, row_id):
         primary_keys = table_info['primary_keys']
         
         if not primary_keys:
-            return jsonify({
+            return ojsonify({
                 'status': 'error',
                 'message': f"Table '{table_name}' has no primary key"
             }), 400
         
         primary_key = primary_keys[0]  # Use the first primary key
         
-        # Build and execute the query
-        query = f"DELETE FROM {table_name} WHERE {primary_key} = :id RETURNING *"
-        result = execute_query(query, {'id': row_id})
+        result = execute_query(get_statement(table_name, 'delete'), {'pk_value': row_id})
         
         if not result:
-            return jsonify({
+            return ojsonify({
                 'status': 'error',
                 'message': f"Row with {primary_key}={row_id} not found"
             }), 404
         
-        return jsonify({
+        return ojsonify({
             'status': 'success',
             'message': f"Row with {primary_key}={row_id} deleted successfully"
         })
     except Exception as e:
         current_app.logger.error(f"Error deleting row: {str(e)}")
-        return jsonify({
+        return ojsonify({
             'status': 'error',
             'message': str(e)
         }), 500
@@ -282,38 +323,45 @@ def execute_sql():
         # This endpoint should be properly secured in a production environment
         data = request.json
         if not data or 'query' not in data:
-            return jsonify({
+            return ojsonify({
                 'status': 'error',
                 'message': "Query not provided"
             }), 400
         
         query = data['query']
         params = data.get('params', {})
+        is_select = _is_select(query)
+        response_format = _preferred_format(_QUERY_FORMATS) if is_select else 'application/json'
+        
+        # Stream large result sets from a server-side cursor when asked to
+        if response_format == NDJSON_MIMETYPE:
+            return _ndjson_response(stream_query(query, params))
         
         # Execute the query
         result = execute_query(query, params)
         
         # For SELECT queries, return the results
-        if query.strip().lower().startswith('select'):
+        if is_select:
             # Convert result rows to list of dictionaries
             rows = [list(row) for row in result]
-            return jsonify({
+            return _rows_response({
                 'status': 'success',
                 'data': {
                     'rows': rows,
                     'count': len(rows)
                 }
-            })
+            }, result, response_format)
         
         # For other queries, return success
-        return jsonify({
+        return ojsonify({
             'status': 'success',
             'message': "Query executed successfully",
-            'rows_affected': len(result) if result else 0
+            # A row count for plain DML, the returned rows for e.g. RETURNING
+            'rows_affected': result if isinstance(result, int) else len(result)
         })
     except Exception as e:
         current_app.logger.error(f"Error executing SQL: {str(e)}")
-        return jsonify({
+        return ojsonify({
             'status': 'error',
             'message': str(e)
         }), 500 
\ No newline at end of file
@@ -1,12 +1,11 @@
-from flask import Blueprint, request, Response, current_app, stream_with_context, jsonify
+from flask import request, Response, current_app, stream_with_context, jsonify
 from app.llm.llm_client import LLMClient
 from app.utils.db_utils import generate_context_for_llm
-import json
-import time
+from app.utils.sse_utils import SSE_HEADERS, format_sse_message
 
-sse_bp = Blueprint('sse', __name__, url_prefix='/sse')
+# The views below are registered lazily by create_app() (see LazyView), so
+# this module is only imported once one of them is first requested.
 
-@sse_bp.route('/models', methods=['GET'])
 def get_available_models():
     """
     Get a list of available LLM models.
@@ -32,7 +31,6 @@ def get_available_models():
         'default_model': default_model
     })
 
-@sse_bp.route('/llm', methods=['POST'])
 def stream_llm_response():
     """
     Stream LLM responses with database context using SSE.
@@ -48,7 +46,7 @@ def stream_llm_response():
         data = request.json
         if not data or 'prompt' not in data:
             return Response(
-                _format_sse_message({'error': 'Prompt is required'}),
+                format_sse_message({'error': 'Prompt is required'}),
                 status=400,
                 content_type='text/event-stream'
             )
@@ -57,8 +55,10 @@ def stream_llm_response():
         tables = data.get('tables', None)
         model_name = data.get('model', None)  # Get the requested model name
         
-        # Generate context about the database
-        context = generate_context_for_llm(prompt, tables)
+        # Generate context about the database. The prompt itself is sent as the
+        # user message, so it is left out of the context to keep the system
+        # message identical across requests.
+        context = generate_context_for_llm(table_names=tables)
         
         # Create the LLM client with optional model specification
         llm_client = LLMClient(model=model_name)
@@ -70,7 +70,7 @@ def stream_llm_response():
         def generate():
             """Generate SSE events for streaming LLM responses."""
             # Send initial event with model info
-            yield _format_sse_message({
+            yield format_sse_message({
                 'status': 'started',
                 'model': llm_client.model_name
             })
@@ -78,44 +78,26 @@ def stream_llm_response():
             try:
                 # Stream the response from the LLM
                 for chunk in llm_client.generate_completion(prompt, context, streaming=True):
-                    yield _format_sse_message({'chunk': chunk})
-                    time.sleep(0.01)  # Small delay to avoid overwhelming the client
+                    yield format_sse_message({'chunk': chunk})
                 
                 # Send completion event
-                yield _format_sse_message({'status': 'completed'})
+                yield format_sse_message({'status': 'completed'})
             except Exception as e:
                 current_app.logger.error(f"Error in LLM streaming: {str(e)}")
-                yield _format_sse_message({'error': str(e)})
+                yield format_sse_message({'error': str(e)})
             
             # End SSE connection
-            yield _format_sse_message({'status': 'closed'}, event='close')
+            yield format_sse_message({'status': 'closed'}, event='close')
         
         return Response(
             generate(),
             content_type='text/event-stream',
-            headers={
-                'Cache-Control': 'no-cache',
-                'X-Accel-Buffering': 'no'  # Disable buffering for nginx
-            }
+            headers=SSE_HEADERS
         )
         
     except Exception as e:
         current_app.logger.error(f"Error setting up LLM streaming: {str(e)}")
         return Response(
-            _format_sse_message({'error': str(e)}),
+            format_sse_message({'error': str(e)}),
             content_type='text/event-stream'
-        )
-
-def _format_sse_message(data, event='message'):
-    """
-    Format a message for SSE.
-    
-    Args:
-        data: The data to send
-        event: The event type (default: 'message')
-        
-    Returns:
-        Formatted SSE message
-    """
-    json_data = json.dumps(data)
-    return f"event: {event}\ndata: {json_data}\n\n" 
\ No newline at end of file
+        )
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""
+Binary encodings for row results, chosen by content negotiation.
+ormsgpack and pyarrow are optional and only imported when a client asks for
+one of these formats.
+"""
+
+import io
+from importlib.util import find_spec
+from app.utils.json_utils import serialize_default
+
+MSGPACK_MIMETYPE = 'application/x-msgpack'
+PARQUET_MIMETYPE = 'application/vnd.apache.parquet'
+
+def available_mimetypes():
+    """
+    List the binary formats whose encoder is installed.
+    
+    Returns:
+        A list of mimetypes, to be offered in content negotiation.
+    """
+    mimetypes = []
+    if find_spec('ormsgpack') is not None:
+        mimetypes.append(MSGPACK_MIMETYPE)
+    if find_spec('pyarrow') is not None:
+        mimetypes.append(PARQUET_MIMETYPE)
+    return mimetypes
+
+def to_msgpack(obj):
+    """
+    Serialize an object to MessagePack with ormsgpack.
+    
+    Args:
+        obj: The object to serialize (the same structures accepted by the JSON encoder)
+        
+    Returns:
+        The encoded bytes.
+    """
+    import ormsgpack
+    return ormsgpack.packb(obj, default=serialize_default, option=ormsgpack.OPT_NON_STR_KEYS)
+
+def to_parquet(rows):
+    """
+    Write rows to an in-memory Parquet file with pyarrow.
+    
+    Args:
+        rows: A sequence of rows, either Row objects or row mappings
+        
+    Returns:
+        The Parquet file contents as bytes.
+    """
+    import pyarrow
+    import pyarrow.parquet
+    
+    table = pyarrow.Table.from_pylist([dict(getattr(row, '_mapping', row)) for row in rows])
+    buffer = io.BytesIO()
+    pyarrow.parquet.write_table(table, buffer)
+    return buffer.getvalue()
\ No newline at end of file
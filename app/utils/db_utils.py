@@ -1,32 +1,44 @@
-from app.models.dynamic import get_all_tables_info, get_table_info, execute_query
+from functools import lru_cache
+import orjson
+from app.models.dynamic import db, get_all_tables_info, get_table_info, execute_query, get_table, get_schema_version, columns_of
 
 def get_db_schema_description():
     """
     Generate a text description of the database schema for the LLM.
     """
+    # Lets a stale schema cache start its background refresh
+    get_all_tables_info()
+    return _describe_schema(get_schema_version())
+
+@lru_cache(maxsize=4)
+def _describe_schema(schema_version):
+    """Build the schema description, memoized for each reflected schema version."""
     tables_info = get_all_tables_info()
-    description = "Database Schema:\n\n"
+    parts = ["Database Schema:\n\n"]
     
-    for table_name, table_info in tables_info.items():
-        description += f"Table: {table_name}\n"
-        description += "Columns:\n"
+    # Tables are listed in a fixed order so the description is byte-for-byte
+    # stable across requests (and schema refreshes), which lets LLM providers
+    # reuse their cached prefill for the prompt prefix.
+    for table_name, table_info in sorted(tables_info.items()):
+        parts.append(f"Table: {table_name}\n")
+        parts.append("Columns:\n")
         
         for column in table_info['columns']:
             pk_marker = " (Primary Key)" if column['primary_key'] else ""
             nullable = "NULL" if column['nullable'] else "NOT NULL"
             default = f" DEFAULT {column['default']}" if column['default'] is not None else ""
-            description += f"  - {column['name']}: {column['type']} {nullable}{default}{pk_marker}\n"
+            parts.append(f"  - {column['name']}: {column['type']} {nullable}{default}{pk_marker}\n")
         
         if table_info['foreign_keys']:
-            description += "Foreign Keys:\n"
+            parts.append("Foreign Keys:\n")
             for fk in table_info['foreign_keys']:
                 constrained = ", ".join(fk['constrained_columns'])
                 referred = ", ".join(fk['referred_columns'])
-                description += f"  - {constrained} -> {fk['referred_table']}({referred})\n"
+                parts.append(f"  - {constrained} -> {fk['referred_table']}({referred})\n")
         
-        description += "\n"
+        parts.append("\n")
     
-    return description
+    return "".join(parts)
 
 def get_table_sample_data(table_name, limit=5):
     """
@@ -36,51 +48,124 @@ def get_table_sample_data(table_name, limit=5):
     if not table_info:
         return f"Table {table_name} not found."
     
-    query = f"SELECT * FROM {table_name} LIMIT {limit}"
     try:
-        results = execute_query(query)
-        
-        # Get column names
-        columns = [col['name'] for col in table_info['columns']]
-        
-        # Format results as text
-        output = f"Sample data from {table_name} (showing up to {limit} rows):\n\n"
-        output += " | ".join(columns) + "\n"
-        output += "-" * (sum(len(col) for col in columns) + 3 * (len(columns) - 1)) + "\n"
-        
-        for row in results:
-            output += " | ".join(str(val) for val in row) + "\n"
+        # Same query and value rendering as generate_context_for_llm
+        bulk_context = get_bulk_context([table_name], limit)
+        if table_name not in bulk_context:
+            return f"Table {table_name} not found."
+        _, rows = bulk_context[table_name]
         
-        return output
+        return _format_sample_data(table_name, rows, limit)
     except Exception as e:
         return f"Error retrieving sample data from {table_name}: {str(e)}"
 
+def _format_sample_data(table_name, rows, limit):
+    """Format sample rows (sequences of values in column order) as a text table."""
+    parts = [f"Sample data from {table_name} (showing up to {limit} rows):\n\n"]
+    parts.append(_sample_header(columns_of(table_name)))
+    
+    for row in rows:
+        parts.append(" | ".join([str(val) for val in row]))
+        parts.append("\n")
+    
+    return "".join(parts)
+
+@lru_cache(maxsize=256)
+def _sample_header(columns):
+    """Build the column header and divider lines of a sample data table."""
+    header = " | ".join(columns)
+    return f"{header}\n{'-' * len(header)}\n"
+
 def get_table_row_count(table_name):
     """
     Get the number of rows in a table.
     """
     try:
-        results = execute_query(f"SELECT COUNT(*) FROM {table_name}")
-        return f"Table {table_name} has {results[0][0]} rows."
+        bulk_context = get_bulk_context([table_name], limit=0)
+        if table_name not in bulk_context:
+            return f"Table {table_name} not found."
+        row_count, _ = bulk_context[table_name]
+        return f"Table {table_name} has {row_count} rows."
     except Exception as e:
         return f"Error counting rows in {table_name}: {str(e)}"
 
+def get_bulk_context(table_names, limit=5):
+    """
+    Get the row count and sample rows of several tables in one round trip.
+    
+    Args:
+        table_names (list): Names of the tables to describe
+        limit (int, optional): Maximum number of sample rows per table
+        
+    Returns:
+        A dict mapping each existing table name to a (row count, sample rows)
+        tuple, where every sample row is a list of values in column order,
+        rendered as PostgreSQL text (None for NULL).
+        Tables that do not exist are left out.
+    """
+    tables = [get_table(name) for name in table_names]
+    tables = [table for table in tables if table is not None]
+    if not tables:
+        return {}
+    
+    # Identifiers come from the reflected metadata and are quoted by the dialect
+    preparer = db.engine.dialect.identifier_preparer
+    subqueries = []
+    for position, table in enumerate(tables):
+        quoted = preparer.format_table(table)
+        # Cast every column to text so values keep their database formatting
+        # (e.g. numeric scale and precision) instead of going through JSON numbers
+        columns = ", ".join(
+            f"{preparer.quote(column.name)}::text AS {preparer.quote(column.name)}" for column in table.c
+        )
+        subqueries.append(
+            f"SELECT {position} AS position, "
+            f"(SELECT count(*) FROM {quoted}) AS row_count, "
+            f"(SELECT json_agg(row_to_json(s))::text FROM (SELECT {columns} FROM {quoted} LIMIT :limit) s) AS sample"
+        )
+    query = " UNION ALL ".join(subqueries)
+    
+    bulk_context = {}
+    for position, row_count, sample in execute_query(query, {'limit': limit}):
+        table = tables[position]
+        # row_to_json keeps the column order of the table
+        rows = [list(row.values()) for row in orjson.loads(sample)] if sample else []
+        bulk_context[table.name] = (row_count, rows)
+    return bulk_context
+
 def generate_context_for_llm(query=None, table_names=None):
     """
     Generate context about the database for the LLM based on a user query.
     Optionally focus on specific tables if table_names is provided.
     """
     # Start with schema description
-    context = get_db_schema_description()
+    parts = [get_db_schema_description()]
     
     # If specific tables are mentioned, include sample data for those tables
     if table_names:
+        try:
+            bulk_context = get_bulk_context(table_names)
+        except Exception as e:
+            bulk_context = {}
+            error = str(e)
+        else:
+            error = None
+        
         for table_name in table_names:
-            context += "\n" + get_table_row_count(table_name) + "\n"
-            context += get_table_sample_data(table_name) + "\n"
+            table_info = get_table_info(table_name)
+            if not table_info:
+                parts.append(f"\nTable {table_name} not found.\n")
+            elif error is not None:
+                parts.append(f"\nError counting rows in {table_name}: {error}\n")
+                parts.append(f"Error retrieving sample data from {table_name}: {error}\n")
+            else:
+                row_count, rows = bulk_context[table_name]
+                parts.append(f"\nTable {table_name} has {row_count} rows.\n")
+                parts.append(_format_sample_data(table_name, rows, 5))
+                parts.append("\n")
     
     # Include the user query if provided
     if query:
-        context += f"\nUser Query: {query}\n"
+        parts.append(f"\nUser Query: {query}\n")
     
-    return context 
\ No newline at end of file
+    return "".join(parts) 
\ No newline at end of file
@@ -0,0 +1,36 @@
+import decimal
+from collections.abc import Mapping
+import orjson
+from flask.json.provider import JSONProvider
+
+def serialize_default(obj):
+    """Convert the types orjson (and ormsgpack) do not handle natively."""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, Mapping):
+        # e.g. SQLAlchemy RowMapping
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(obj):
+    """
+    Serialize an object to JSON with orjson.
+    
+    Returns:
+        The JSON document as UTF-8 encoded bytes.
+    """
+    return orjson.dumps(obj, default=serialize_default, option=orjson.OPT_NON_STR_KEYS)
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, used by jsonify() and request.get_json()."""
+    
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        # Used by request.get_json(); orjson accepts both str and bytes
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype='application/json')
\ No newline at end of file
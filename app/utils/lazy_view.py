@@ -0,0 +1,24 @@
+from werkzeug.utils import import_string
+
+class LazyView:
+    """
+    View function that imports the real view on its first call.
+    Registering routes through this keeps the view module (and everything it
+    imports) out of application start-up until a request actually needs it.
+    """
+    
+    def __init__(self, import_name):
+        """
+        Initialize the lazy view.
+        
+        Args:
+            import_name (str): Dotted import path of the view function
+        """
+        self.import_name = import_name
+        self.__name__ = import_name.rsplit('.', 1)[-1]
+        self.view = None
+    
+    def __call__(self, *args, **kwargs):
+        if self.view is None:
+            self.view = import_string(self.import_name)
+        return self.view(*args, **kwargs)
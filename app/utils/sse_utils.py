@@ -0,0 +1,27 @@
+from app.utils.json_utils import dumps
+
+# Response headers for SSE streams
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'  # Disable buffering for nginx
+}
+
+# Framing for the common 'message' event, built once
+_DEFAULT_PREFIX = b"event: message\ndata: "
+_SUFFIX = b"\n\n"
+
+def format_sse_message(data, event='message'):
+    """
+    Format a message for SSE.
+    
+    Args:
+        data: The data to send
+        event: The event type (default: 'message')
+        
+    Returns:
+        Formatted SSE message as bytes
+    """
+    body = dumps(data)
+    if event == 'message':
+        return _DEFAULT_PREFIX + body + _SUFFIX
+    return b"event: " + event.encode('ascii') + b"\ndata: " + body + _SUFFIX
\ No newline at end of file
@@ -0,0 +1,23 @@
+import multiprocessing
+import os
+
+# Gunicorn settings for serving the app in production:
+#   gunicorn --config gunicorn.conf.py 'app:create_app()'
+#
+# gevent workers multiplex many long-lived SSE streams per process, where a
+# sync or gthread worker would stay pinned to one stream until it finishes.
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+# Each worker holds its own database pool (see SQLALCHEMY_ENGINE_OPTIONS in
+# app/config.py): keep workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below the
+# PostgreSQL max_connections setting.
+workers = int(os.environ.get('GUNICORN_WORKERS', 2 * multiprocessing.cpu_count()))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+keepalive = 5
+
+def post_fork(server, worker):
+    """Make psycopg2 yield to other greenlets while waiting on the database."""
+    if worker_class == 'gevent':
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
\ No newline at end of file
@@ -1,9 +1,19 @@
 from app import create_app
+from app.config import get_config
 import os
-
-app = create_app()
+import sys
 
 if __name__ == '__main__':
+    # The Werkzeug server handles one request at a time, so it is only used
+    # for local debugging (the default, development configuration). Production
+    # runs under gunicorn (see gunicorn.conf.py). The check reads the config
+    # before create_app(), so nothing connects to the database if it fails.
+    if not get_config().DEBUG:
+        sys.exit("run.py starts the development server only; use a debug configuration "
+                 "(e.g. FLASK_ENV=development) or run: gunicorn --config gunicorn.conf.py 'app:create_app()'")
+    
+    app = create_app()
+    
     # Get port from environment or use default
     port = int(os.environ.get('PORT', 5001))
     
@@ -0,0 +1,68 @@
+import unittest
+import io
+import json
+import os
+import orjson
+import ormsgpack
+import pyarrow.parquet
+from app import create_app
+from app.utils.binary_formats import MSGPACK_MIMETYPE, PARQUET_MIMETYPE
+
+class ContentNegotiationTestCase(unittest.TestCase):
+    """Test case for choosing the response format from the Accept header."""
+    
+    def setUp(self):
+        """Set up the test environment."""
+        # Use the testing configuration
+        os.environ['FLASK_ENV'] = 'testing'
+        
+        self.app = create_app()
+        self.client = self.app.test_client()
+    
+    def execute(self, accept=None):
+        """Run a small SELECT through the execute endpoint."""
+        headers = {'Accept': accept} if accept else {}
+        return self.client.post('/api/execute',
+                                data=json.dumps({'query': "SELECT 1 AS id, 'alice' AS name"}),
+                                content_type='application/json',
+                                headers=headers)
+    
+    def test_defaults_to_json(self):
+        """Test that JSON is returned without an Accept header."""
+        response = self.execute()
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(orjson.loads(response.data)['data'], {'rows': [[1, 'alice']], 'count': 1})
+    
+    def test_prefers_json_for_wildcards(self):
+        """Test that JSON wins when the client accepts anything."""
+        response = self.execute('*/*')
+        
+        self.assertEqual(response.mimetype, 'application/json')
+    
+    def test_msgpack(self):
+        """Test that MessagePack is returned with the same envelope as JSON."""
+        response = self.execute(MSGPACK_MIMETYPE)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, MSGPACK_MIMETYPE)
+        self.assertEqual(ormsgpack.unpackb(response.data)['data'], {'rows': [[1, 'alice']], 'count': 1})
+    
+    def test_parquet(self):
+        """Test that Parquet holds the rows keyed by column name."""
+        response = self.execute(PARQUET_MIMETYPE)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, PARQUET_MIMETYPE)
+        table = pyarrow.parquet.read_table(io.BytesIO(response.data))
+        self.assertEqual(table.to_pylist(), [{'id': 1, 'name': 'alice'}])
+    
+    def test_quality_values(self):
+        """Test that the highest-quality acceptable format is chosen."""
+        response = self.execute(f'application/json;q=0.5, {MSGPACK_MIMETYPE}')
+        
+        self.assertEqual(response.mimetype, MSGPACK_MIMETYPE)
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
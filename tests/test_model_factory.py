@@ -0,0 +1,150 @@
+import unittest
+import dataclasses
+import threading
+from unittest import mock
+from app.llm import model_factory
+from app.llm.model_factory import LLMFactory, OllamaClient, OpenAIClient, _prefetch
+
+class StreamParsingTestCase(unittest.TestCase):
+    """Test case for parsing streamed LLM responses."""
+    
+    def test_openai_parses_content(self):
+        """Test that content is taken from the delta of a data line."""
+        line = b'data: {"choices": [{"delta": {"content": "Hello"}}]}'
+        self.assertEqual(OpenAIClient._parse_stream_line(line), ('Hello', False))
+    
+    def test_openai_done(self):
+        """Test that the [DONE] sentinel ends the stream."""
+        self.assertEqual(OpenAIClient._parse_stream_line(b'data: [DONE]'), (None, True))
+        self.assertEqual(OpenAIClient._parse_stream_line(b'data:[DONE]'), (None, True))
+    
+    def test_openai_skips_non_data_lines(self):
+        """Test that separators, comments and event names are skipped."""
+        for line in (b'', b': keep-alive', b'event: message', b'id: 1'):
+            self.assertEqual(OpenAIClient._parse_stream_line(line), (None, False))
+    
+    def test_openai_skips_events_without_content(self):
+        """Test that events without content neither yield text nor end the stream."""
+        for line in (b'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+                     b'data: {"choices": []}',
+                     b'data: {"usage": {"total_tokens": 3}}'):
+            self.assertEqual(OpenAIClient._parse_stream_line(line), (None, False))
+    
+    def test_openai_skips_invalid_json(self):
+        """Test that a malformed data line is logged and skipped."""
+        with self.assertLogs(model_factory.log, level='ERROR'):
+            self.assertEqual(OpenAIClient._parse_stream_line(b'data: {'), (None, False))
+    
+    def test_ollama_parses_content(self):
+        """Test that content is taken from the response field."""
+        line = b'{"response": "Hello", "done": false}'
+        self.assertEqual(OllamaClient._parse_stream_line(line), ('Hello', False))
+    
+    def test_ollama_done(self):
+        """Test that the done flag ends the stream."""
+        line = b'{"response": "", "done": true}'
+        self.assertEqual(OllamaClient._parse_stream_line(line), ('', True))
+    
+    def test_ollama_skips_empty_lines_and_events_without_content(self):
+        """Test that empty lines and objects without a response are skipped."""
+        self.assertEqual(OllamaClient._parse_stream_line(b''), (None, False))
+        self.assertEqual(OllamaClient._parse_stream_line(b'{"status": "loading"}'), (None, False))
+    
+    def test_ollama_skips_invalid_json(self):
+        """Test that a malformed line is logged and skipped."""
+        with self.assertLogs(model_factory.log, level='ERROR'):
+            self.assertEqual(OllamaClient._parse_stream_line(b'{'), (None, False))
+
+class PrefetchTestCase(unittest.TestCase):
+    """Test case for the background token prefetcher."""
+    
+    def test_yields_all_tokens_in_order(self):
+        """Test that every token is passed through in order."""
+        tokens = (str(i) for i in range(500))
+        self.assertEqual(list(_prefetch(tokens, maxsize=4)), [str(i) for i in range(500)])
+    
+    def test_reraises_producer_exception(self):
+        """Test that an error in the upstream generator reaches the consumer."""
+        def tokens():
+            yield 'a'
+            yield 'b'
+            raise RuntimeError('upstream failed')
+        
+        received = []
+        with self.assertRaisesRegex(RuntimeError, 'upstream failed'):
+            for token in _prefetch(tokens()):
+                received.append(token)
+        
+        # Tokens produced before the error are still delivered
+        self.assertEqual(received, ['a', 'b'])
+    
+    def test_stops_producer_when_consumer_closes(self):
+        """Test that closing the consumer early stops and closes the upstream generator."""
+        closed = threading.Event()
+        produced = []
+        
+        def tokens():
+            try:
+                for i in range(10000):
+                    produced.append(i)
+                    yield i
+            finally:
+                closed.set()
+        
+        stream = _prefetch(tokens(), maxsize=2)
+        self.assertEqual(next(stream), 0)
+        stream.close()
+        
+        self.assertTrue(closed.wait(timeout=5))
+        self.assertLess(len(produced), 10000)
+
+class LLMFactoryTestCase(unittest.TestCase):
+    """Test case for choosing an LLM client by model name."""
+    
+    def setUp(self):
+        """Set up the test environment."""
+        LLMFactory._create_client.cache_clear()
+        
+        # OpenAI clients refuse to be created without an API key
+        settings = dataclasses.replace(model_factory._SETTINGS, openai_api_key='test-key')
+        patcher = mock.patch.object(model_factory, '_SETTINGS', settings)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def tearDown(self):
+        """Tear down the test environment."""
+        LLMFactory._create_client.cache_clear()
+    
+    def test_openai_models(self):
+        """Test that GPT models dispatch to the OpenAI client."""
+        for model_name in ('gpt-4', 'gpt-4o-mini', 'text-davinci-003'):
+            client = LLMFactory.get_llm_client(model_name)
+            self.assertIsInstance(client, OpenAIClient)
+            self.assertEqual(client.model, model_name)
+    
+    def test_ollama_models(self):
+        """Test that tagged local models dispatch to the Ollama client."""
+        for model_name in ('llama2', 'llama2:13b', 'mistral:7b', 'codellama:7b'):
+            client = LLMFactory.get_llm_client(model_name)
+            self.assertIsInstance(client, OllamaClient)
+            self.assertEqual(client.model, model_name)
+    
+    def test_claude_models_not_implemented(self):
+        """Test that recognised but unsupported models raise NotImplementedError."""
+        for model_name in ('claude', 'claude-2', 'claude-3-opus'):
+            with self.assertRaises(NotImplementedError):
+                LLMFactory.get_llm_client(model_name)
+    
+    def test_unknown_model_defaults_to_openai(self):
+        """Test that unknown models fall back to the OpenAI client with a warning."""
+        with self.assertLogs(model_factory.log, level='WARNING'):
+            client = LLMFactory.get_llm_client('some-new-model')
+        self.assertIsInstance(client, OpenAIClient)
+    
+    def test_clients_are_shared_per_model(self):
+        """Test that the same client instance is reused for a model name."""
+        self.assertIs(LLMFactory.get_llm_client('codellama:7b'),
+                      LLMFactory.get_llm_client('codellama:7b'))
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import unittest
 import json
+import orjson
 import sseclient
 import requests
 import os
@@ -48,8 +49,9 @@ class SSETestCase(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         
         # Check the error message in the SSE response
-        data = json.loads(response.data.decode('utf-8').split('\n')[1].replace('data: ', ''))
-        self.assertIn('error', data)
+        events = list(sseclient.SSEClient(response.iter_encoded()).events())
+        self.assertEqual(events[0].event, 'message')
+        self.assertIn('error', orjson.loads(events[0].data))
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file